@@ -1,6 +1,9 @@
+import os
 from flask import Flask, render_template, request, jsonify
+from werkzeug.middleware.proxy_fix import ProxyFix
 from game_engine.chess_engine import ChessEngine
 from game_engine.checkers_engine import CheckersEngine
+from game_engine.scheduler import AIScheduler, SchedulerError, env_int
 
 
 def create_app():
@@ -10,13 +13,23 @@ def create_app():
         static_folder="static",
     )
 
+    # за прокси (Heroku и т.п.) задать TRUSTED_PROXIES=1, иначе XFF от клиента игнорируется
+    trusted_proxies = env_int("TRUSTED_PROXIES", 0)
+    if trusted_proxies > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies)
+
     chess = ChessEngine()
     checkers = CheckersEngine()
+    scheduler = AIScheduler.from_env()
 
     def get_mode(data: dict) -> str:
         m = (data.get("mode") or "chess").strip().lower()
         return "checkers" if m == "checkers" else "chess"
 
+    def client_id() -> str:
+        # X-Forwarded-For учитывается только через ProxyFix (TRUSTED_PROXIES)
+        return request.remote_addr or "unknown"
+
     def is_pos(x) -> bool:
         return isinstance(x, list) and len(x) == 2 and all(isinstance(i, int) for i in x)
 
@@ -26,7 +39,7 @@ def create_app():
 
     @app.get("/api/health")
     def health():
-        return jsonify({"status": "ok"})
+        return jsonify({"status": "ok", "ai": scheduler.stats()})
 
     @app.post("/api/new")
     def new_game():
@@ -34,11 +47,13 @@ def create_app():
         mode = get_mode(data)
 
         if mode == "chess":
-            chess.reset()
-            return jsonify({"ok": True, "mode": "chess", "state": chess.get_state()})
+            with chess.lock:
+                chess.reset()
+                return jsonify({"ok": True, "mode": "chess", "state": chess.get_state()})
 
-        checkers.reset()
-        return jsonify({"ok": True, "mode": "checkers", "state": checkers.get_state()})
+        with checkers.lock:
+            checkers.reset()
+            return jsonify({"ok": True, "mode": "checkers", "state": checkers.get_state()})
 
     @app.post("/api/legal_moves")
     def legal_moves():
@@ -49,14 +64,11 @@ def create_app():
         if not is_pos(frm):
             return jsonify({"ok": False, "error": "Bad format: 'from' must be [r,c]"}), 400
 
-        if mode == "chess":
-            moves = chess.legal_moves_from(tuple(frm))
-            st = chess.get_state(minimal=True)
-        else:
-            moves = checkers.legal_moves_from(tuple(frm))
-            st = checkers.get_state(minimal=True)
-
-        return jsonify({"ok": True, "moves": moves, "state": st})
+        engine = chess if mode == "chess" else checkers
+        with engine.lock:
+            moves = engine.legal_moves_from(tuple(frm))
+            st = engine.get_state(minimal=True)
+            return jsonify({"ok": True, "moves": moves, "state": st})
 
     @app.post("/api/move")
     def make_move():
@@ -71,11 +83,13 @@ def create_app():
             return jsonify({"ok": False, "error": "Bad move format: use {from:[r,c], to:[r,c]}"}), 400
 
         if mode == "chess":
-            ok, msg = chess.apply_move(tuple(frm), tuple(to), promo)
-            return jsonify({"ok": ok, "message": msg, "state": chess.get_state()})
+            with chess.lock:
+                ok, msg = chess.apply_move(tuple(frm), tuple(to), promo)
+                return jsonify({"ok": ok, "message": msg, "state": chess.get_state()})
 
-        ok, msg = checkers.apply_move(tuple(frm), tuple(to))
-        return jsonify({"ok": ok, "message": msg, "state": checkers.get_state()})
+        with checkers.lock:
+            ok, msg = checkers.apply_move(tuple(frm), tuple(to))
+            return jsonify({"ok": ok, "message": msg, "state": checkers.get_state()})
 
     @app.post("/api/undo")
     def undo():
@@ -90,12 +104,10 @@ def create_app():
 
         steps = max(1, min(10, steps))  # защита от "undo 99999"
 
-        if mode == "chess":
-            ok, msg = chess.undo(steps=steps)
-            return jsonify({"ok": ok, "message": msg, "state": chess.get_state()})
-
-        ok, msg = checkers.undo(steps=steps)
-        return jsonify({"ok": ok, "message": msg, "state": checkers.get_state()})
+        engine = chess if mode == "chess" else checkers
+        with engine.lock:
+            ok, msg = engine.undo(steps=steps)
+            return jsonify({"ok": ok, "message": msg, "state": engine.get_state()})
 
     @app.post("/api/ai_move")
     def ai_move():
@@ -110,12 +122,31 @@ def create_app():
         if kind not in ("ai", "bot"):
             kind = "ai"
 
-        if mode == "chess":
-            ok, msg = chess.ai_move(level=level, kind=kind)
-            return jsonify({"ok": ok, "message": msg, "state": chess.get_state()})
+        # ai_move() takes engine.lock itself; Stockfish runs without holding it
+        engine = chess if mode == "chess" else checkers
 
-        ok, msg = checkers.ai_move(level=level, kind=kind)
-        return jsonify({"ok": ok, "message": msg, "state": checkers.get_state()})
+        if kind == "bot":
+            ok, msg = engine.ai_move(level=level, kind=kind)
+            with engine.lock:
+                return jsonify({"ok": ok, "message": msg, "state": engine.get_state()})
+
+        try:
+            with scheduler.slot(client_id(), mode, level) as run_level:
+                ok, msg = engine.ai_move(level=run_level, kind=kind)
+        except SchedulerError as e:
+            resp = jsonify({"ok": False, "error": str(e)})
+            resp.headers["Retry-After"] = str(max(1, int(e.retry_after + 0.999)))
+            return resp, e.status
+
+        with engine.lock:
+            return jsonify({
+                "ok": ok,
+                "message": msg,
+                "level": run_level,
+                "requestedLevel": level,
+                "degraded": run_level != level,
+                "state": engine.get_state(),
+            })
 
     # Красивый JSON + нормальная ошибка 404 (чтобы понимать, что сломалось)
     app.config["JSON_SORT_KEYS"] = False
@@ -129,7 +160,6 @@ def create_app():
 
 app = create_app()
 
-import os
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port, debug=True)
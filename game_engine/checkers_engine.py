@@ -3,6 +3,7 @@ from dataclasses import dataclass
 from typing import Optional, List, Tuple
 import random
 import copy
+import threading
 
 def opponent(color: str) -> str:
     return "b" if color == "w" else "w"
@@ -32,6 +33,8 @@ class CheckersState:
 
 class CheckersEngine:
     def __init__(self):
+        # shared by all request threads: hold it around anything that touches the game
+        self.lock = threading.RLock()
         self.reset()
 
     def reset(self):
@@ -323,34 +326,35 @@ class CheckersEngine:
         self.state.status = "playing"
 
     def ai_move(self, level: str="medium", kind: str="ai"):
-        if self.state.status != "playing":
-            return False, "Game is over"
-        moves, _ = self._legal_first_steps()
-        if not moves:
-            return False, "No moves"
-
-        def score(m):
-            r2,c2 = m["to"]
-            r1,c1 = m["from"]
-            p = self.state.board[r1][c1]
-            s = 0
-            if m.get("capture"): s += 100
-            if p == "w" and r2 == 0: s += 80
-            if p == "b" and r2 == 7: s += 80
-            s += (3.5 - abs(3.5 - c2)) * 2
-            if p in ("W","B"): s += 10
-            return s
-
-        if kind == "bot" or level == "easy":
-            choice = random.choice(moves)
-        else:
-            scored = [(score(m), m) for m in moves]
-            scored.sort(key=lambda x: x[0], reverse=True)
-            topk = 3 if level == "medium" else 1
-            choice = random.choice(scored[:topk])[1]
-
-        ok, msg = self.apply_move(tuple(choice["from"]), tuple(choice["to"]))
-        if ok:
-            tag = "AI" if kind == "ai" else "BOT"
-            return True, f"{tag}: {msg}"
-        return False, "AI failed"
+        with self.lock:
+            if self.state.status != "playing":
+                return False, "Game is over"
+            moves, _ = self._legal_first_steps()
+            if not moves:
+                return False, "No moves"
+
+            def score(m):
+                r2,c2 = m["to"]
+                r1,c1 = m["from"]
+                p = self.state.board[r1][c1]
+                s = 0
+                if m.get("capture"): s += 100
+                if p == "w" and r2 == 0: s += 80
+                if p == "b" and r2 == 7: s += 80
+                s += (3.5 - abs(3.5 - c2)) * 2
+                if p in ("W","B"): s += 10
+                return s
+
+            if kind == "bot" or level == "easy":
+                choice = random.choice(moves)
+            else:
+                scored = [(score(m), m) for m in moves]
+                scored.sort(key=lambda x: x[0], reverse=True)
+                topk = 3 if level == "medium" else 1
+                choice = random.choice(scored[:topk])[1]
+
+            ok, msg = self.apply_move(tuple(choice["from"]), tuple(choice["to"]))
+            if ok:
+                tag = "AI" if kind == "ai" else "BOT"
+                return True, f"{tag}: {msg}"
+            return False, "AI failed"
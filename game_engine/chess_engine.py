@@ -1,6 +1,7 @@
 from __future__ import annotations
 import os
 import random
+import threading
 import chess
 import chess.engine
 
@@ -23,8 +24,13 @@ _LEVELS = {
 }
 
 class ChessEngine:
-    """Chess rules are fully validated by python-chess."""
+    """Chess rules are fully validated by python-chess.
+
+    One instance is shared by all request threads: callers hold `lock`
+    around anything that reads or changes the game.
+    """
     def __init__(self):
+        self.lock = threading.RLock()
         self.reset()
 
     def reset(self):
@@ -138,39 +144,49 @@ class ChessEngine:
         return (ok_any, "Undone" if ok_any else "Nothing to undo")
 
     def ai_move(self, level: str="medium", kind: str="ai"):
-        """kind='ai' => Stockfish. kind='bot' => random legal move."""
-        if self._status() not in ("playing","check"):
-            return False, "Game is over"
+        """kind='ai' => Stockfish. kind='bot' => random legal move.
 
-        legal = list(self.board.legal_moves)
-        if not legal:
-            return False, "No legal moves"
+        Stockfish searches a copy of the board without holding `lock`;
+        the move is re-validated and pushed under the lock.
+        """
+        with self.lock:
+            if self._status() not in ("playing","check"):
+                return False, "Game is over"
 
-        if kind == "bot":
-            mv = random.choice(legal)
-            self._push_undo()
-            san = self.board.san(mv)
-            self.board.push(mv)
-            self.history_san.append(f"BOT: {san}")
-            return True, f"Bot played {san}"
+            legal = list(self.board.legal_moves)
+            if not legal:
+                return False, "No legal moves"
+
+            if kind == "bot":
+                mv = random.choice(legal)
+                self._push_undo()
+                san = self.board.san(mv)
+                self.board.push(mv)
+                self.history_san.append(f"BOT: {san}")
+                return True, f"Bot played {san}"
+
+            board = self.board.copy()
 
         lvl = _LEVELS.get(level, _LEVELS["medium"])
         engine_path = os.environ.get("STOCKFISH_PATH") or "stockfish"
         try:
             with chess.engine.SimpleEngine.popen_uci(engine_path) as eng:
                 limit = chess.engine.Limit(time=lvl["time"], depth=lvl["depth"])
-                result = eng.play(self.board, limit)
+                result = eng.play(board, limit)
                 mv = result.move
         except FileNotFoundError:
             return False, "Stockfish not found. Install: brew install stockfish (or set STOCKFISH_PATH)"
         except Exception as e:
             return False, f"Engine error: {type(e).__name__}"
 
-        if mv is None or mv not in self.board.legal_moves:
-            return False, "Engine returned illegal move"
+        with self.lock:
+            if self.board.fen() != board.fen():
+                return False, "Position changed while thinking"
+            if mv is None or mv not in self.board.legal_moves:
+                return False, "Engine returned illegal move"
 
-        self._push_undo()
-        san = self.board.san(mv)
-        self.board.push(mv)
-        self.history_san.append(f"AI: {san}")
-        return True, f"AI played {san}"
+            self._push_undo()
+            san = self.board.san(mv)
+            self.board.push(mv)
+            self.history_san.append(f"AI: {san}")
+            return True, f"AI played {san}"
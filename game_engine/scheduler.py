@@ -0,0 +1,189 @@
+from __future__ import annotations
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+LEVEL_ORDER = ("easy", "medium", "hard")
+
+# Short jobs go first: lower number = higher priority.
+_PRIORITY = {"easy": 0, "medium": 1, "hard": 2}
+
+# Max concurrent AI jobs per (mode, level). Chess spawns a Stockfish process per job.
+_DEFAULT_CAPS = {
+    ("chess", "easy"): 4,
+    ("chess", "medium"): 2,
+    ("chess", "hard"): 1,
+    ("checkers", "easy"): 4,
+    ("checkers", "medium"): 4,
+    ("checkers", "hard"): 4,
+}
+
+
+def env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class SchedulerError(Exception):
+    """Request was not admitted. `status` is the HTTP code to answer with."""
+    def __init__(self, message: str, status: int, retry_after: float):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+@dataclass
+class TokenBucket:
+    rate: float      # tokens per second
+    capacity: float
+    tokens: float = 0.0
+    updated: float = field(default_factory=time.monotonic)
+
+    def take(self, now: float) -> float:
+        """Take one token. Returns 0 on success, otherwise seconds until one is available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        if self.rate <= 0:
+            return 60.0
+        return (1.0 - self.tokens) / self.rate
+
+
+@dataclass
+class _Waiter:
+    priority: int
+    seq: int
+    key: Tuple[str, str]
+
+
+class AIScheduler:
+    """Admission control for AI moves.
+
+    - per-client token bucket (429 when empty)
+    - concurrency cap per (mode, level) plus a global cap
+    - waiting jobs are started easy-first, then FIFO
+    - when a level's cap is full and a lower level has a free slot, the job runs
+      at the lower level (hard -> medium -> easy) instead of queueing
+    - a job that waits longer than `max_wait` is rejected (503), which keeps tail latency bounded
+    - at most `max_queue` jobs wait at once; beyond that a job is rejected (503) immediately,
+      so waiting jobs cannot take every server thread
+    """
+    def __init__(self, rate: float=2.0, burst: float=20.0, global_cap: int=6,
+                 caps: Optional[Dict[Tuple[str, str], int]]=None, max_wait: float=5.0,
+                 max_queue: int=4, max_clients: int=10000):
+        self.rate = rate
+        self.burst = burst
+        self.global_cap = max(1, global_cap)
+        self.caps = dict(_DEFAULT_CAPS if caps is None else caps)
+        self.max_wait = max_wait
+        self.max_queue = max(0, max_queue)
+        self.max_clients = max(1, max_clients)
+
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._active: Dict[Tuple[str, str], int] = {}
+        self._active_total = 0
+        self._waiting: List[_Waiter] = []
+        self._seq = itertools.count()
+
+    @classmethod
+    def from_env(cls) -> "AIScheduler":
+        return cls(
+            rate=env_float("AI_RATE_PER_SEC", 2.0),
+            burst=env_float("AI_BURST", 20.0),
+            global_cap=env_int("AI_MAX_CONCURRENT", 6),
+            max_wait=env_float("AI_MAX_WAIT", 5.0),
+            max_queue=env_int("AI_MAX_QUEUE", 4),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"active": self._active_total, "waiting": len(self._waiting)}
+
+    def _cap(self, key: Tuple[str, str]) -> int:
+        return max(1, self.caps.get(key, 1))
+
+    def _has_slot(self, key: Tuple[str, str]) -> bool:
+        return self._active_total < self.global_cap and self._active.get(key, 0) < self._cap(key)
+
+    def _is_next(self, me: _Waiter) -> bool:
+        # The first waiter (by priority, then arrival) that can actually run goes next.
+        for w in sorted(self._waiting, key=lambda x: (x.priority, x.seq)):
+            if self._has_slot(w.key):
+                return w is me
+        return False
+
+    def _take_token(self, client: str, now: float) -> float:
+        # dict order doubles as LRU order: a touched bucket is moved to the end
+        bucket = self._buckets.pop(client, None)
+        if bucket is None:
+            while len(self._buckets) >= self.max_clients:
+                del self._buckets[next(iter(self._buckets))]
+            bucket = TokenBucket(rate=self.rate, capacity=self.burst, tokens=self.burst, updated=now)
+        self._buckets[client] = bucket
+        return bucket.take(now)
+
+    def _degrade(self, mode: str, level: str) -> str:
+        """Lower the level only if its own cap is full and a lower level can start right now.
+
+        When just the global cap is saturated every level would wait anyway,
+        so the job queues at the requested level.
+        """
+        if level not in LEVEL_ORDER or self._active.get((mode, level), 0) < self._cap((mode, level)):
+            return level
+        for lower in reversed(LEVEL_ORDER[:LEVEL_ORDER.index(level)]):
+            if self._has_slot((mode, lower)):
+                return lower
+        return level
+
+    @contextmanager
+    def slot(self, client: str, mode: str, level: str):
+        """Admit one AI job. Yields the (possibly lowered) level to run at."""
+        with self._cond:
+            now = time.monotonic()
+            wait = self._take_token(client, now)
+            if wait > 0:
+                raise SchedulerError("Too many AI requests, slow down", 429, wait)
+
+            level = self._degrade(mode, level)
+            if len(self._waiting) >= self.max_queue and not self._has_slot((mode, level)):
+                raise SchedulerError("Server is busy, try again", 503, 1.0)
+            me = _Waiter(priority=_PRIORITY.get(level, 1), seq=next(self._seq), key=(mode, level))
+            self._waiting.append(me)
+            deadline = now + self.max_wait
+            try:
+                while not self._is_next(me):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise SchedulerError("Server is busy, try again", 503, 1.0)
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting.remove(me)
+                # our leaving can make someone else the head of the queue
+                self._cond.notify_all()
+            self._active[me.key] = self._active.get(me.key, 0) + 1
+            self._active_total += 1
+
+        try:
+            yield level
+        finally:
+            with self._cond:
+                self._active[me.key] -= 1
+                self._active_total -= 1
+                self._cond.notify_all()
@@ -0,0 +1,15 @@
+# Used by the Procfile. The AI scheduler keeps its state in process memory,
+# so there is exactly one worker; requests run on its threads.
+import os
+from game_engine.scheduler import AIScheduler
+
+# Heroku's router is the one proxy in front of the app: trust its
+# X-Forwarded-For entry so clients get separate rate limits.
+os.environ.setdefault("TRUSTED_PROXIES", "1")
+
+workers = 1
+
+# Every running or queued AI job holds a thread; keep spare ones so moves,
+# health checks and static files are still served when the AI queue is full.
+_ai = AIScheduler.from_env()
+threads = _ai.global_cap + _ai.max_queue + 8
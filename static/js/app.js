@@ -203,6 +203,23 @@ async function startNew(){
   await maybeComputerMove();
 }
 
+const sleep = ms => new Promise(r => setTimeout(r, ms));
+
+// 429/503 from the server's AI limits: wait Retry-After and ask again,
+// otherwise the board stays on the computer's turn (e.g. mid multi-jump)
+async function requestComputerMove(){
+  for(let attempt = 0; ; attempt++){
+    const res = await postJSON("/api/ai_move", { mode, level: aiLevel(), kind: computerKind() });
+    if((res.status === 429 || res.status === 503) && attempt < 5){
+      setMessage(`${res.payload.error || "Server is busy"} — retrying…`, "bad");
+      await sleep((res.retryAfter || 1) * 1000);
+      if(!isVsComputer() || isUsersTurn()) return null;
+      continue;
+    }
+    return res;
+  }
+}
+
 async function maybeComputerMove(){
   if(!state) return;
   if(!isVsComputer()) return;
@@ -210,20 +227,27 @@ async function maybeComputerMove(){
   if(isUsersTurn()) return;
 
   setMessage("Computer is thinking…", "info");
-  const res = await postJSON("/api/ai_move", { mode, level: aiLevel(), kind: computerKind() });
+  const res = await requestComputerMove();
+  if(!res) return;
   if(!res.ok || !res.payload.ok){
     setMessage(res.payload.message || res.payload.error || "Computer move failed", "bad");
     return;
   }
   state = res.payload.state;
-  setMessage(res.payload.message || "Computer moved", "good");
+  let text = res.payload.message || "Computer moved";
+  if(res.payload.degraded) text += ` (server busy: level lowered to ${res.payload.level})`;
+  setMessage(text, "good");
 
   if(mode === "checkers"){
     let guard = 0;
     while(isVsComputer() && !isUsersTurn() && state.forced && guard < 16){
       guard += 1;
-      const res2 = await postJSON("/api/ai_move", { mode, level: aiLevel(), kind: computerKind() });
-      if(!res2.ok || !res2.payload.ok) break;
+      const res2 = await requestComputerMove();
+      if(!res2) break;
+      if(!res2.ok || !res2.payload.ok){
+        setMessage(res2.payload.message || res2.payload.error || "Computer move failed", "bad");
+        break;
+      }
       state = res2.payload.state;
     }
   }
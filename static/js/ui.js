@@ -7,5 +7,6 @@ export async function postJSON(url, data){
     body: JSON.stringify(data)
   });
   const payload = await res.json().catch(()=> ({}));
-  return { ok: res.ok, status: res.status, payload };
+  const retryAfter = Number(res.headers.get("Retry-After")) || 0;
+  return { ok: res.ok, status: res.status, payload, retryAfter };
 }
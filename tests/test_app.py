@@ -0,0 +1,161 @@
+import random
+import threading
+import time
+
+import chess
+import chess.engine
+import pytest
+
+from app import create_app
+from game_engine.chess_engine import ChessEngine
+
+
+@pytest.fixture
+def make_client(monkeypatch):
+    def make(**env):
+        for k in ("AI_RATE_PER_SEC", "AI_BURST", "AI_MAX_CONCURRENT", "AI_MAX_WAIT",
+                  "AI_MAX_QUEUE", "TRUSTED_PROXIES"):
+            monkeypatch.delenv(k, raising=False)
+        for k, v in env.items():
+            monkeypatch.setenv(k, str(v))
+        return create_app().test_client()
+    return make
+
+
+@pytest.fixture
+def blocking_ai(monkeypatch):
+    """Stub ChessEngine.ai_move; calls block until `release` is set."""
+    started = threading.Event()
+    release = threading.Event()
+
+    def ai_move(self, level="medium", kind="ai"):
+        started.set()
+        assert release.wait(5)
+        return True, f"AI played at {level}"
+
+    monkeypatch.setattr(ChessEngine, "ai_move", ai_move)
+    return started, release
+
+
+def _post_in_thread(client, payload, out):
+    t = threading.Thread(target=lambda: out.append(client.post("/api/ai_move", json=payload)))
+    t.start()
+    return t
+
+
+def test_ai_move_rate_limited_with_retry_after(make_client, monkeypatch):
+    monkeypatch.setattr(ChessEngine, "ai_move", lambda self, level="medium", kind="ai": (True, "ok"))
+    client = make_client(AI_BURST=1, AI_RATE_PER_SEC=0.5)
+
+    assert client.post("/api/ai_move", json={"mode": "chess", "level": "easy"}).status_code == 200
+    r = client.post("/api/ai_move", json={"mode": "chess", "level": "easy"})
+    assert r.status_code == 429
+    assert r.get_json()["ok"] is False
+    assert int(r.headers["Retry-After"]) >= 1
+
+
+def test_ai_move_busy_after_max_wait(make_client, blocking_ai):
+    started, release = blocking_ai
+    client = make_client(AI_MAX_CONCURRENT=1, AI_MAX_WAIT=0.05)
+    out = []
+    t = _post_in_thread(client, {"mode": "chess", "level": "easy"}, out)
+    try:
+        assert started.wait(5)
+        r = client.post("/api/ai_move", json={"mode": "chess", "level": "easy"})
+        assert r.status_code == 503
+        assert "Retry-After" in r.headers
+    finally:
+        release.set()
+        t.join()
+    assert out[0].status_code == 200
+
+
+def test_ai_move_reports_degraded_level(make_client, blocking_ai):
+    started, release = blocking_ai
+    client = make_client()
+    out = []
+    # chess "hard" has a cap of 1, so the second request runs at "medium"
+    t = _post_in_thread(client, {"mode": "chess", "level": "hard"}, out)
+    try:
+        assert started.wait(5)
+        started.clear()
+        second = []
+        t2 = _post_in_thread(client, {"mode": "chess", "level": "hard"}, second)
+        assert started.wait(5)
+    finally:
+        release.set()
+        t.join()
+        t2.join()
+
+    body = second[0].get_json()
+    assert second[0].status_code == 200
+    assert body["level"] == "medium"
+    assert body["requestedLevel"] == "hard"
+    assert body["degraded"] is True
+    assert body["message"] == "AI played at medium"
+
+    first = out[0].get_json()
+    assert first["level"] == "hard" and first["degraded"] is False
+
+
+def test_bot_moves_skip_scheduler(make_client):
+    client = make_client(AI_BURST=1, AI_RATE_PER_SEC=0)
+    for _ in range(3):
+        r = client.post("/api/ai_move", json={"mode": "checkers", "kind": "bot"})
+        assert r.status_code == 200
+        assert "level" not in r.get_json()
+
+
+class _FakeStockfish:
+    """Like a UCI engine: takes the position at call time, answers a bit later.
+
+    Records every (fen, move) it was asked about.
+    """
+    searched = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def play(self, board, limit):
+        position = chess.Board(board.fen())
+        time.sleep(random.uniform(0.005, 0.05))
+        mv = random.choice(list(position.legal_moves))
+        self.searched.add((position.fen(), mv.uci()))
+        return chess.engine.PlayResult(mv, None)
+
+
+def test_concurrent_ai_moves_keep_board_consistent(make_client, monkeypatch):
+    _FakeStockfish.searched = set()
+    monkeypatch.setattr(chess.engine.SimpleEngine, "popen_uci", lambda path: _FakeStockfish())
+    client = make_client(AI_BURST=100, AI_MAX_CONCURRENT=8, AI_MAX_QUEUE=30)
+    client.post("/api/new", json={"mode": "chess"})
+
+    out = []
+    threads = []
+    for _ in range(24):
+        threads.append(_post_in_thread(client, {"mode": "chess", "level": "easy"}, out))
+        time.sleep(0.005)
+    for t in threads:
+        t.join()
+
+    played = [r for r in out if r.status_code == 200 and r.get_json()["ok"]]
+    assert played
+
+    # one more (bot) move returns the full state, including fen and history
+    state = client.post("/api/ai_move", json={"mode": "chess", "kind": "bot"}).get_json()["state"]
+    history = state["history"]
+    assert len(history) == len(played) + 1
+
+    # replaying the history gives the current position, and every AI move
+    # was searched on exactly the position it was played in
+    board = chess.Board()
+    for entry in history:
+        tag, san = entry.split(": ", 1)
+        mv = board.parse_san(san)
+        if tag == "AI":
+            assert (board.fen(), mv.uci()) in _FakeStockfish.searched
+        board.push(mv)
+    assert board.fen() == state["fen"]
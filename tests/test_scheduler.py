@@ -0,0 +1,138 @@
+import threading
+import time
+from contextlib import ExitStack
+
+import pytest
+
+from game_engine.scheduler import AIScheduler, SchedulerError, TokenBucket
+
+
+def _hold(scheduler, stack, n, mode, level, client="holder"):
+    for i in range(n):
+        stack.enter_context(scheduler.slot(f"{client}{i}", mode, level))
+
+
+def _run_in_thread(scheduler, client, mode, level, out, hold=0.0):
+    def job():
+        try:
+            with scheduler.slot(client, mode, level) as lvl:
+                out.append((client, lvl))
+                time.sleep(hold)
+        except SchedulerError as e:
+            out.append((client, e.status))
+    t = threading.Thread(target=job)
+    t.start()
+    return t
+
+
+def _wait_for_waiting(scheduler, n, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while scheduler.stats()["waiting"] < n:
+        assert time.monotonic() < deadline, "jobs did not queue up"
+        time.sleep(0.005)
+
+
+def test_token_bucket_take_and_refill():
+    b = TokenBucket(rate=1.0, capacity=2.0, tokens=2.0, updated=0.0)
+    assert b.take(0.0) == 0.0
+    assert b.take(0.0) == 0.0
+    assert b.take(0.0) == pytest.approx(1.0)
+    assert b.take(0.5) == pytest.approx(0.5)
+    assert b.take(1.0) == 0.0
+    # refill never exceeds capacity
+    b.take(100.0)
+    assert b.tokens == pytest.approx(1.0)
+
+
+def test_rate_limit_returns_429():
+    s = AIScheduler(rate=1.0, burst=1.0)
+    with s.slot("a", "chess", "easy"):
+        pass
+    with pytest.raises(SchedulerError) as exc:
+        with s.slot("a", "chess", "easy"):
+            pass
+    assert exc.value.status == 429
+    assert exc.value.retry_after > 0
+    # other clients have their own bucket
+    with s.slot("b", "chess", "easy"):
+        pass
+
+
+def test_bucket_table_evicts_least_recently_used():
+    s = AIScheduler(rate=0.0, burst=1.0, max_clients=1)
+    with s.slot("a", "chess", "easy"):
+        pass
+    with s.slot("b", "chess", "easy"):
+        pass
+    # "a" was evicted to make room for "b", so it starts with a full bucket again
+    with s.slot("a", "chess", "easy"):
+        pass
+    with pytest.raises(SchedulerError):
+        with s.slot("a", "chess", "easy"):
+            pass
+
+
+def test_no_degrade_when_only_global_cap_is_full():
+    s = AIScheduler(global_cap=2, max_wait=2.0)
+    out = []
+    with ExitStack() as stack:
+        _hold(s, stack, 2, "chess", "medium")
+        t = _run_in_thread(s, "c", "chess", "hard", out)
+        _wait_for_waiting(s, 1)
+    t.join()
+    assert out == [("c", "hard")]
+
+
+def test_degrade_when_level_cap_is_full():
+    s = AIScheduler()
+    with ExitStack() as stack:
+        _hold(s, stack, 1, "chess", "hard")
+        with s.slot("c", "chess", "hard") as lvl:
+            assert lvl == "medium"
+
+
+def test_easy_jobs_start_before_hard():
+    s = AIScheduler(global_cap=1, max_wait=2.0)
+    out = []
+    with ExitStack() as stack:
+        _hold(s, stack, 1, "checkers", "medium")
+        threads = [_run_in_thread(s, "h", "checkers", "hard", out, hold=0.02)]
+        _wait_for_waiting(s, 1)
+        threads.append(_run_in_thread(s, "e", "checkers", "easy", out, hold=0.02))
+        _wait_for_waiting(s, 2)
+    for t in threads:
+        t.join()
+    assert out == [("e", "easy"), ("h", "hard")]
+
+
+def test_max_wait_returns_503():
+    s = AIScheduler(global_cap=1, max_wait=0.05)
+    with ExitStack() as stack:
+        _hold(s, stack, 1, "chess", "easy")
+        with pytest.raises(SchedulerError) as exc:
+            with s.slot("c", "chess", "easy"):
+                pass
+    assert exc.value.status == 503
+    assert s.stats() == {"active": 0, "waiting": 0}
+
+
+def test_full_queue_returns_503_immediately():
+    s = AIScheduler(global_cap=1, max_wait=5.0, max_queue=0)
+    with ExitStack() as stack:
+        _hold(s, stack, 1, "chess", "easy")
+        started = time.monotonic()
+        with pytest.raises(SchedulerError) as exc:
+            with s.slot("c", "chess", "easy"):
+                pass
+    assert exc.value.status == 503
+    assert time.monotonic() - started < 1.0
+
+
+def test_slot_released_on_exception():
+    s = AIScheduler(global_cap=1, max_wait=0.05)
+    with pytest.raises(RuntimeError):
+        with s.slot("a", "chess", "hard"):
+            raise RuntimeError("engine crashed")
+    assert s.stats()["active"] == 0
+    with s.slot("b", "chess", "hard") as lvl:
+        assert lvl == "hard"